@@ -90,6 +90,7 @@ FULL_FEATURE_DF = pd.DataFrame(
     ],
     columns=["region", "variable", "unit"] + TEST_YEARS,
 )
+FULL_FEATURE_DF_TIME = FULL_FEATURE_DF.rename(DTS_MAPPING, axis="columns")
 
 
 img = ["IMAGE", "a_scenario"]
@@ -199,18 +200,30 @@ def test_df_index():
 
 
 # IamDataFrame with variable-and-region-structure for testing aggregation tools
-@pytest.fixture(scope="function", params=[None, "datetime"])
+# (module-scoped, tests that modify the object must work on a copy)
+@pytest.fixture(scope="module", params=["simple_df_year", "simple_df_time"])
 def simple_df(request):
-    _df = FULL_FEATURE_DF.copy()
-    if request.param == "datetime":
-        _df.rename(DTS_MAPPING, axis="columns", inplace=True)
-    df = IamDataFrame(model="model_a", scenario="scen_a", data=_df)
+    yield request.getfixturevalue(request.param)
+
+
+# `simple_df` with time domain 'year'
+@pytest.fixture(scope="module")
+def simple_df_year():
+    df = IamDataFrame(model="model_a", scenario="scen_a", data=FULL_FEATURE_DF)
+    df.set_meta("foo", "string")
+    yield df
+
+
+# `simple_df` with time domain 'datetime'
+@pytest.fixture(scope="module")
+def simple_df_time():
+    df = IamDataFrame(model="model_a", scenario="scen_a", data=FULL_FEATURE_DF_TIME)
     df.set_meta("foo", "string")
     yield df
 
 
 # IamDataFrame with subannual time resolution
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def subannual_df():
     _df = FULL_FEATURE_DF.iloc[0:6].copy()
 
@@ -241,7 +254,8 @@ def plot_df():
 
 
 # IamDataFrame with two scenarios and structure for recursive aggregation
-@pytest.fixture(scope="function", params=["year", "datetime"])
+# (module-scoped, tests that modify the object must work on a copy)
+@pytest.fixture(scope="module", params=["year", "datetime"])
 def recursive_df(request):
     data = (
         RECURSIVE_DF
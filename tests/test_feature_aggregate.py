@@ -4,66 +4,189 @@ import re
 import numpy as np
 import pandas as pd
 from pyam import check_aggregate, IamDataFrame
-from pyam.utils import IAMC_IDX
 from pyam.testing import assert_iamframe_equal
 
 from .conftest import DTS_MAPPING
 
-LONG_IDX = IAMC_IDX + ["year"]
+# run all tests of this module in one worker with `pytest -n auto --dist=loadgroup`
+# to share the module-scoped fixtures (`simple_df`, `simple_df_views`, ...);
+# tests must work on a copy if they modify any of these objects
+pytestmark = pytest.mark.xdist_group("aggregate")
 
-PE_MAX_DF = pd.DataFrame(
-    [
-        ["model_a", "scen_a", "World", "Primary Energy", "EJ/yr", 2005, 9.0],
-        ["model_a", "scen_a", "World", "Primary Energy", "EJ/yr", 2010, 10.0],
-        ["model_a", "scen_a", "reg_a", "Primary Energy", "EJ/yr", 2005, 6.0],
-        ["model_a", "scen_a", "reg_a", "Primary Energy", "EJ/yr", 2010, 6.0],
-        ["model_a", "scen_a", "reg_b", "Primary Energy", "EJ/yr", 2005, 3.0],
-        ["model_a", "scen_a", "reg_b", "Primary Energy", "EJ/yr", 2010, 4.0],
-    ],
-    columns=LONG_IDX + ["value"],
-)
+# variables (or lists of variables) used in the aggregation tests
+AGG_VARIABLES = {
+    "pe": "Primary Energy",
+    "pe_co2": ["Primary Energy", "Emissions|CO2"],
+    "pe_sub": ["Primary Energy", "Primary Energy|Coal", "Primary Energy|Wind"],
+}
 
-CO2_MAX_DF = pd.DataFrame(
+# expected results of aggregating using `max` as method
+MAX_RECORDS = np.array(
     [
-        ["model_a", "scen_a", "World", "Emissions|CO2", "EJ/yr", 2005, 6.0],
-        ["model_a", "scen_a", "World", "Emissions|CO2", "EJ/yr", 2010, 8.0],
-        ["model_a", "scen_a", "reg_a", "Emissions|CO2", "EJ/yr", 2005, 4.0],
-        ["model_a", "scen_a", "reg_a", "Emissions|CO2", "EJ/yr", 2010, 5.0],
-        ["model_a", "scen_a", "reg_b", "Emissions|CO2", "EJ/yr", 2005, 2.0],
-        ["model_a", "scen_a", "reg_b", "Emissions|CO2", "EJ/yr", 2010, 3.0],
+        ("model_a", "scen_a", "World", "Primary Energy", "EJ/yr", 2005, 9.0),
+        ("model_a", "scen_a", "World", "Primary Energy", "EJ/yr", 2010, 10.0),
+        ("model_a", "scen_a", "reg_a", "Primary Energy", "EJ/yr", 2005, 6.0),
+        ("model_a", "scen_a", "reg_a", "Primary Energy", "EJ/yr", 2010, 6.0),
+        ("model_a", "scen_a", "reg_b", "Primary Energy", "EJ/yr", 2005, 3.0),
+        ("model_a", "scen_a", "reg_b", "Primary Energy", "EJ/yr", 2010, 4.0),
+        ("model_a", "scen_a", "World", "Emissions|CO2", "EJ/yr", 2005, 6.0),
+        ("model_a", "scen_a", "World", "Emissions|CO2", "EJ/yr", 2010, 8.0),
+        ("model_a", "scen_a", "reg_a", "Emissions|CO2", "EJ/yr", 2005, 4.0),
+        ("model_a", "scen_a", "reg_a", "Emissions|CO2", "EJ/yr", 2010, 5.0),
+        ("model_a", "scen_a", "reg_b", "Emissions|CO2", "EJ/yr", 2005, 2.0),
+        ("model_a", "scen_a", "reg_b", "Emissions|CO2", "EJ/yr", 2010, 3.0),
+        ("model_a", "scen_a", "World", "Price|Carbon", "USD/tCO2", 2005, 10.0),
+        ("model_a", "scen_a", "World", "Price|Carbon", "USD/tCO2", 2010, 30.0),
+    ],
+    dtype=[
+        ("model", "U8"),
+        ("scenario", "U8"),
+        ("region", "U8"),
+        ("variable", "U16"),
+        ("unit", "U16"),
+        ("year", "i8"),
+        ("value", "f8"),
     ],
-    columns=LONG_IDX + ["value"],
 )
 
-PRICE_MAX_DF = pd.DataFrame(
+PE_MAX_DF = pd.DataFrame(MAX_RECORDS[MAX_RECORDS["variable"] == "Primary Energy"])
+CO2_MAX_DF = pd.DataFrame(MAX_RECORDS[MAX_RECORDS["variable"] == "Emissions|CO2"])
+PRICE_MAX_DF = pd.DataFrame(MAX_RECORDS[MAX_RECORDS["variable"] == "Price|Carbon"])
+
+# expected results by (lists of) variables
+MAX_DATA = {
+    "pe": PE_MAX_DF,
+    "pe_co2": pd.concat([PE_MAX_DF, CO2_MAX_DF], ignore_index=True),
+    "price": PRICE_MAX_DF,
+    "price_co2": pd.concat([PRICE_MAX_DF, CO2_MAX_DF], ignore_index=True),
+}
+
+# expected results with time domain 'datetime'
+MAX_DATA_TIME = {
+    key: _df.assign(year=_df.year.map(DTS_MAPPING)).rename(columns={"year": "time"})
+    for key, _df in MAX_DATA.items()
+}
+
+
+# rows with missing weights or data as shown in the log, by time domain
+MISSING_ROWS_LOG = {
+    "year": {
+        "2010": "\n0  model_a   scen_a  reg_b  2010",
+        "all": "\n0  model_a   scen_a  reg_b  2005\n1  model_a   scen_a  reg_b  2010",
+    },
+    "datetime": {
+        "2010": "\n0  model_a   scen_a  reg_b 2010-07-21",
+        "all": (
+            "\n0  model_a   scen_a  reg_b 2005-06-17"
+            "\n1  model_a   scen_a  reg_b 2010-07-21"
+        ),
+    },
+}
+
+MISSING_WEIGHTS_MATCH = {
+    (time_domain, key): re.compile(
+        r"Missing weights for the following data.*\n.*" + re.escape(rows)
+    )
+    for time_domain, logs in MISSING_ROWS_LOG.items()
+    for key, rows in logs.items()
+}
+
+# header of the time column in the log, by time domain
+TIME_COL_LOG = {"year": "year", "datetime": "     time"}
+
+MISSING_DATA_MSG = {
+    (time_domain, key): (
+        "Ignoring weights for the following missing data rows:\n"
+        f"     model scenario region  {TIME_COL_LOG[time_domain]}" + rows
+    )
+    for time_domain, logs in MISSING_ROWS_LOG.items()
+    for key, rows in logs.items()
+}
+
+# expected `exclude` after `check_aggregate(..., exclude_on_fail=True)`
+EXP_EXCLUDE = np.array([True, False])
+
+# expected non-matching data returned by the `check_...` methods
+EXP_CHECK_AGGREGATE = np.array([[12.0, 3.0], [15.0, 5.0]])
+EXP_CHECK_AGGREGATE_TOP_LEVEL = np.array([[12.0, 3.0], [8.0, 2.0], [4.0, 1.0]])
+EXP_CHECK_AGGREGATE_REGION = np.array([[12.0, 4.0], [15.0, 6.0]])
+EXP_CHECK_INTERNAL_CONSISTENCY = np.array(
     [
-        ["model_a", "scen_a", "World", "Price|Carbon", "USD/tCO2", 2005, 10.0],
-        ["model_a", "scen_a", "World", "Price|Carbon", "USD/tCO2", 2010, 30.0],
-    ],
-    columns=LONG_IDX + ["value"],
+        [np.nan, np.nan, 9.0, 3.0],
+        [np.nan, np.nan, 10.0, 4.0],
+        [8.0, 2.0, np.nan, np.nan],
+        [9.0, 3.0, np.nan, np.nan],
+    ]
 )
 
 
-@pytest.mark.parametrize(
-    "variable,data",
-    (
-        ("Primary Energy", PE_MAX_DF),
-        (["Primary Energy", "Emissions|CO2"], pd.concat([PE_MAX_DF, CO2_MAX_DF])),
-    ),
-)
-def test_aggregate(simple_df, variable, data):
+def _assert_logged(caplog, msg, level="INFO"):
+    """Check that `msg` was logged (first occurrence) at the expected `level`"""
+    for record in caplog.records:
+        if record.getMessage() == msg:
+            assert record.levelname == level
+            return
+    raise AssertionError(f"Message not found in log: {msg}")
+
+
+def _assert_data_equal(obs, exp):
+    """Check that the timeseries data of `obs` and `exp` are equal (not the meta)
+
+    This assumes that both objects are sorted and skips aligning the data.
+    """
+    assert obs.dimensions == exp.dimensions
+    assert obs._data.index.equals(exp._data.index)
+    np.testing.assert_allclose(obs._data.to_numpy(), exp._data.to_numpy())
+
+
+# subsets of `simple_df` used repeatedly in the aggregation tests
+@pytest.fixture(scope="module")
+def simple_df_views(simple_df):
+    pe, pe_co2, pe_sub = (AGG_VARIABLES[k] for k in ["pe", "pe_co2", "pe_sub"])
+    yield {
+        "pe": simple_df.filter(variable=pe),
+        "pe_co2": simple_df.filter(variable=pe_co2),
+        "pe_world": simple_df.filter(variable=pe, region="World"),
+        "pe_sub_world": simple_df.filter(variable=pe_sub, region="World"),
+        "pe_reg_a": simple_df.filter(variable=pe, region="reg_a"),
+        "pe_sub_reg_a": simple_df.filter(variable=pe_sub, region="reg_a"),
+    }
+
+
+# expected results of aggregating (across regions) using `max` as method,
+# shared by all `method` parametrizations of the tests below
+@pytest.fixture(scope="module")
+def max_exp(simple_df):
+    data = MAX_DATA if simple_df.time_col == "year" else MAX_DATA_TIME
+    exp = {k: IamDataFrame(data[k], meta=simple_df.meta) for k in ["pe", "pe_co2"]}
+    for k in ["price", "price_co2"]:
+        _exp = IamDataFrame(data[k], meta=simple_df.meta)
+        exp[f"{k}_world"] = _exp.filter(region="World")
+    yield exp
+
+
+# `simple_df` with a negative value of 'Emissions|CO2' (used as weight) in 2010
+@pytest.fixture(scope="module")
+def neg_weights_df(simple_df):
+    df = simple_df.copy()
+    df._data.iloc[18] = -6
+    yield df
+
+
+@pytest.mark.parametrize("key", ("pe", "pe_co2"))
+def test_aggregate(simple_df, simple_df_views, key):
     # check that `variable` is a a direct sum and matches given total
-    exp = simple_df.filter(variable=variable)
+    variable = AGG_VARIABLES[key]
+    exp = simple_df_views[key]
     assert_iamframe_equal(simple_df.aggregate(variable), exp)
 
+
+@pytest.mark.parametrize("method", ["max", np.max], ids=["max-str", "np.max"])
+@pytest.mark.parametrize("key", ("pe", "pe_co2"))
+def test_aggregate_with_other_method(simple_df, max_exp, key, method):
     # use other method (max) both as string and passing the function
-    _df = data.copy()
-    if simple_df.time_col == "time":
-        _df.year = _df.year.replace(DTS_MAPPING)
-        _df.rename({"year": "time"}, axis="columns", inplace=True)
-    exp = IamDataFrame(_df, meta=simple_df.meta)
-    for m in ["max", np.max]:
-        assert_iamframe_equal(simple_df.aggregate(variable, method=m), exp)
+    obs = simple_df.aggregate(AGG_VARIABLES[key], method=method)
+    assert_iamframe_equal(obs, max_exp[key])
 
 
 def test_check_aggregate(simple_df):
@@ -74,8 +197,7 @@ def test_check_aggregate(simple_df):
     obs = simple_df.filter(
         variable="Primary Energy|Coal", region="World", keep=False
     ).check_aggregate("Primary Energy")
-    exp = pd.DataFrame([[12.0, 3.0], [15.0, 5.0]])
-    np.testing.assert_array_equal(obs.values, exp.values)
+    np.testing.assert_array_equal(obs.values, EXP_CHECK_AGGREGATE)
 
 
 def test_check_aggregate_top_level(simple_df):
@@ -90,11 +212,10 @@ def test_check_aggregate_top_level(simple_df):
     obs = check_aggregate(
         _df, variable="Primary Energy", year=2005, exclude_on_fail=True
     )
-    exp = pd.DataFrame([[12.0, 3.0], [8.0, 2.0], [4.0, 1.0]])
-    np.testing.assert_array_equal(obs.values, exp.values)
+    np.testing.assert_array_equal(obs.values, EXP_CHECK_AGGREGATE_TOP_LEVEL)
 
     # assert that scenario `foo` has correctly been assigned as `exclude=True`
-    np.testing.assert_array_equal(_df.exclude, [True, False])
+    np.testing.assert_array_equal(_df.exclude, EXP_EXCLUDE)
 
 
 @pytest.mark.parametrize(
@@ -142,7 +263,7 @@ def test_aggregate_recursive(recursive_df):
 
 def test_aggregate_skip_intermediate(recursive_df):
     # make the data inconsistent, check (and then skip) validation
-
+    recursive_df = recursive_df.copy()
     recursive_df._data.iloc[0] = recursive_df._data.iloc[0] + 2
     recursive_df._data.iloc[3] = recursive_df._data.iloc[3] + 2
 
@@ -178,8 +299,7 @@ def test_aggregate_empty(test_df, variable, append, caplog):
         assert test_df.aggregate(variable).empty
 
     msg = f"Cannot aggregate variable '{variable}' because it has no components."
-    idx = caplog.messages.index(msg)
-    assert caplog.records[idx].levelname == "INFO"
+    _assert_logged(caplog, msg, "INFO")
 
 
 def test_aggregate_unknown_method(simple_df):
@@ -193,21 +313,16 @@ def test_aggregate_components_as_dict(simple_df):
         simple_df.aggregate("Primary Energy", components={"Primary Energy|Coal": "foo"})
 
 
-@pytest.mark.parametrize(
-    "variable",
-    (
-        "Primary Energy",
-        (["Primary Energy", "Primary Energy|Coal", "Primary Energy|Wind"]),
-    ),
-)
-def test_aggregate_region(simple_df, variable):
+@pytest.mark.parametrize("key", ("pe", "pe_sub"))
+def test_aggregate_region(simple_df, simple_df_views, key):
     # check that `variable` is a a direct sum across regions
-    exp = simple_df.filter(variable=variable, region="World")
-    assert_iamframe_equal(simple_df.aggregate_region(variable), exp)
+    variable = AGG_VARIABLES[key]
+    exp = simple_df_views[f"{key}_world"]
+    _assert_data_equal(simple_df.aggregate_region(variable), exp)
 
     # check custom `region` (will include `World`, so double-count values)
     foo = exp.rename(region={"World": "foo"})
-    foo._data = foo._data * 2
+    foo._data *= 2
     assert_iamframe_equal(simple_df.aggregate_region(variable, region="foo"), foo)
 
 
@@ -219,8 +334,7 @@ def test_check_aggregate_region(simple_df):
     obs = simple_df.filter(
         variable="Primary Energy", region="reg_a", keep=False
     ).check_aggregate_region("Primary Energy")
-    exp = pd.DataFrame([[12.0, 4.0], [15.0, 6.0]])
-    np.testing.assert_array_equal(obs.values, exp.values)
+    np.testing.assert_array_equal(obs.values, EXP_CHECK_AGGREGATE_REGION)
 
 
 def test_check_aggregate_region_log(simple_df, caplog):
@@ -231,8 +345,7 @@ def test_check_aggregate_region_log(simple_df, caplog):
         ).check_aggregate_region("Primary Energy")
     )
     msg = "Variable 'Primary Energy' does not exist in region 'World'."
-    idx = caplog.messages.index(msg)
-    assert caplog.records[idx].levelname == "INFO"
+    _assert_logged(caplog, msg, "INFO")
 
 
 @pytest.mark.parametrize(
@@ -249,48 +362,37 @@ def test_aggregate_region_append(simple_df, variable):
     assert_iamframe_equal(_df, simple_df)
 
 
-@pytest.mark.parametrize(
-    "variable",
-    (
-        "Primary Energy",
-        (["Primary Energy", "Primary Energy|Coal", "Primary Energy|Wind"]),
-    ),
-)
-def test_aggregate_region_with_subregions(simple_df, variable):
+@pytest.mark.parametrize("key", ("pe", "pe_sub"))
+def test_aggregate_region_with_subregions(simple_df, simple_df_views, key):
     # check that custom `subregions` works (assumes only `reg_a` is in `World`)
-    exp = simple_df.filter(variable=variable, region="reg_a").rename(
-        region={"reg_a": "World"}
-    )
+    variable = AGG_VARIABLES[key]
+    exp = simple_df_views[f"{key}_reg_a"].rename(region={"reg_a": "World"})
     obs = simple_df.aggregate_region(variable, subregions="reg_a")
     assert_iamframe_equal(obs, exp)
 
-    # check that both custom `region` and `subregions` work
-    foo = exp.rename(region={"World": "foo"})
+    # check that both custom `region` and `subregions` work (`exp` is a fresh object)
+    exp.rename(region={"World": "foo"}, inplace=True)
     obs = simple_df.aggregate_region(variable, region="foo", subregions="reg_a")
-    assert_iamframe_equal(obs, foo)
+    assert_iamframe_equal(obs, exp)
 
     # check that invalid list of subregions returns empty
     assert simple_df.aggregate_region(variable, subregions=["reg_c"]).empty
 
 
+@pytest.mark.parametrize("method", ["max", np.max], ids=["max-str", "np.max"])
 @pytest.mark.parametrize(
-    "variable,data",
+    "variable,key",
     (
-        ("Price|Carbon", PRICE_MAX_DF),
-        (["Price|Carbon", "Emissions|CO2"], pd.concat([PRICE_MAX_DF, CO2_MAX_DF])),
+        ("Price|Carbon", "price"),
+        (["Price|Carbon", "Emissions|CO2"], "price_co2"),
     ),
 )
-def test_aggregate_region_with_other_method(simple_df, variable, data):
+def test_aggregate_region_with_other_method(
+    simple_df, max_exp, variable, key, method
+):
     # use other method (max) both as string and passing the function
-    _df = data.copy()
-    if simple_df.time_col == "time":
-        _df.year = _df.year.replace(DTS_MAPPING)
-        _df.rename({"year": "time"}, axis="columns", inplace=True)
-
-    exp = IamDataFrame(_df, meta=simple_df.meta).filter(region="World")
-    for m in ["max", np.max]:
-        obs = simple_df.aggregate_region(variable, method=m)
-        assert_iamframe_equal(obs, exp)
+    obs = simple_df.aggregate_region(variable, method=method)
+    assert_iamframe_equal(obs, max_exp[f"{key}_world"])
 
 
 def test_aggregate_region_with_components(simple_df):
@@ -316,14 +418,12 @@ def test_aggregate_region_with_weights(simple_df, caplog):
     assert_iamframe_equal(simple_df.aggregate_region(v, weight=w), exp)
 
 
-def test_aggregate_region_with_negative_weights(simple_df, caplog):
+def test_aggregate_region_with_negative_weights(simple_df, neg_weights_df, caplog):
     # carbon price shouldn't be summed but be weighted by emissions
     v = "Price|Carbon"
     w = "Emissions|CO2"
 
     # dropping negative weights works as expected
-    neg_weights_df = simple_df.copy()
-    neg_weights_df._data[18] = -6
     exp = simple_df.filter(variable=v, region="World", year=2010)
     assert_iamframe_equal(neg_weights_df.aggregate_region(v, weight=w), exp)
 
@@ -332,8 +432,7 @@ def test_aggregate_region_with_negative_weights(simple_df, caplog):
         "To use both positive and negative weights, please use the keyword argument "
         "`drop_negative_weights=False`."
     )
-    idx = caplog.messages.index(msg)
-    assert caplog.records[idx].levelname == "WARNING"
+    _assert_logged(caplog, msg, "WARNING")
 
     # *not* dropping negative weights works as expected
     exp = simple_df.filter(variable=v, region="World")
@@ -344,31 +443,31 @@ def test_aggregate_region_with_negative_weights(simple_df, caplog):
 
 
 @pytest.mark.parametrize(
-    "filter_arg,log_message",
+    "simple_df,time_domain",
     (
-        (dict(year=2010), ""),
-        (dict(), "model_a   scen_a  reg_b  2005\n1  "),
+        ("simple_df_year", "year"),
+        ("simple_df_time", "datetime"),
+    ),
+    indirect=["simple_df"],
+    ids=["year", "datetime"],
+)
+@pytest.mark.parametrize(
+    "filter_arg,rows",
+    (
+        (dict(year=2010), "2010"),
+        (dict(), "all"),
     ),
 )
 def test_aggregate_region_with_weights_inconsistent_index(
-    simple_df, caplog, filter_arg, log_message
+    simple_df, caplog, time_domain, filter_arg, rows
 ):
     # carbon price shouldn't be summed but be weighted by emissions
     v = "Price|Carbon"
     w = "Emissions|CO2"
 
-    log_message = "\n0  " + log_message + "model_a   scen_a  reg_b  2010"
-    if simple_df.time_domain == "datetime":
-        time_col = "     time"
-        log_message = log_message.replace(" 2005", "2005-06-17").replace(
-            " 2010", "2010-07-21"
-        )
-    else:
-        time_col = "year"
-
     # missing weight row raises an error
     _df = simple_df.filter(variable=w, region="reg_b", keep=False, **filter_arg)
-    match = r"Missing weights for the following data.*\n.*" + re.escape(log_message)
+    match = MISSING_WEIGHTS_MATCH[time_domain, rows]
     with pytest.raises(ValueError, match=match):
         _df.aggregate_region(v, weight=w)
 
@@ -380,13 +479,7 @@ def test_aggregate_region_with_weights_inconsistent_index(
     _df = simple_df.filter(variable=v, region="reg_b", keep=False, **filter_arg)
     assert_iamframe_equal(_df.aggregate_region(v, weight=w), exp)
 
-    msg = (
-        "Ignoring weights for the following missing data rows:\n"
-        f"     model scenario region  {time_col}" + log_message
-    )
-
-    idx = caplog.messages.index(msg)
-    assert caplog.records[idx].levelname == "WARNING"
+    _assert_logged(caplog, MISSING_DATA_MSG[time_domain, rows], "WARNING")
 
 
 def test_aggregate_region_with_weights_raises(simple_df):
@@ -426,8 +519,7 @@ def test_aggregate_region_empty(test_df, variable, append, caplog):
         f"Cannot aggregate variable '{variable}' to 'World' "
         "because it does not exist in any subregion."
     )
-    idx = caplog.messages.index(msg)
-    assert caplog.records[idx].levelname == "INFO"
+    _assert_logged(caplog, msg, "INFO")
 
 
 def test_aggregate_region_unknown_method(simple_df):
@@ -461,12 +553,4 @@ def test_check_internal_consistency(simple_df):
     ).check_internal_consistency(components=True)
 
     # test reported inconsistency
-    exp = pd.DataFrame(
-        [
-            [np.nan, np.nan, 9.0, 3.0],
-            [np.nan, np.nan, 10.0, 4.0],
-            [8.0, 2.0, np.nan, np.nan],
-            [9.0, 3.0, np.nan, np.nan],
-        ]
-    )
-    np.testing.assert_array_equal(obs.values, exp.values)
+    np.testing.assert_array_equal(obs.values, EXP_CHECK_INTERNAL_CONSISTENCY)
@@ -35,6 +35,7 @@ def test_downscale_region_with_multiple_methods_raises(simple_df):
     ),
 )
 def test_downscale_region_with_proxy(simple_df, variable):
+    simple_df = simple_df.copy()
     simple_df.set_meta([1], name="test")
     regions = ["reg_a", "reg_b"]
 
@@ -58,6 +59,7 @@ def test_downscale_region_with_proxy(simple_df, variable):
     ),
 )
 def test_downscale_region_with_weight(simple_df, variable, index):
+    simple_df = simple_df.copy()
     simple_df.set_meta([1], name="test")
     regions = ["reg_a", "reg_b"]
 
@@ -85,6 +87,7 @@ def test_downscale_region_with_weight(simple_df, variable, index):
     ),
 )
 def test_downscale_region_with_weight_subregions(simple_df, variable, index):
+    simple_df = simple_df.copy()
     simple_df.set_meta([1], name="test")
     regions = ["reg_a", "reg_b"]
 
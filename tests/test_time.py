@@ -1,12 +1,14 @@
+import functools
 import pytest
+import re
 import numpy as np
 import pandas as pd
 import pandas.testing as pdt
-from datetime import datetime
 from pyam import IamDataFrame
 from pyam.testing import assert_iamframe_equal
 
 from .conftest import (
+    TEST_DF,
     TEST_YEARS,
     TEST_DTS,
     TEST_TIME_STR,
@@ -15,7 +17,10 @@ from .conftest import (
 )
 
 
+# the helpers below are cached, so tests must not modify the returned objects
+@functools.lru_cache(maxsize=None)
 def get_subannual_df(date1, date2):
+    """Return IamDataFrame with year and subannual columns"""
     df = pd.DataFrame(
         [
             ["scen_a", "Primary Energy", 2005, date1, 1.0],
@@ -30,9 +35,19 @@ def get_subannual_df(date1, date2):
     return IamDataFrame(df, model="model_a", region="World", unit="EJ/yr")
 
 
+@functools.lru_cache(maxsize=None)
+def get_time_df(columns):
+    """Return IamDataFrame with `columns` as time domain"""
+    return IamDataFrame(TEST_DF.rename({2005: columns[0], 2010: columns[1]}, axis=1))
+
+
 # this is the subannual column format used in the openENTRANCE project
 OE_DATETIME = ["2005-10-01 23:15+01:00", "2010-10-02 23:15+01:00"]
-OE_SUBANNUAL_FORMAT = lambda x: x.strftime("%m-%d %H:%M%z").replace("+0100", "+01:00")
+
+
+def oe_subannual_format(x):
+    """Format as "%m-%d %H:%M%z" with a colon in the UTC offset (e.g. "+01:00")"""
+    return re.sub(r"([+-]\d{2})(\d{2})$", r"\1:\2", x.strftime("%m-%d %H:%M%z"))
 
 
 # TODO implement this parametrization as part of `conftest.py:test_df`
@@ -45,6 +60,7 @@ OE_SUBANNUAL_FORMAT = lambda x: x.strftime("%m-%d %H:%M%z").replace("+0100", "+0
         (TEST_TIME_STR_HR, "datetime", pd.DatetimeIndex(TEST_TIME_STR_HR, name="time")),
         (TEST_TIME_MIXED, "mixed", pd.Index(TEST_TIME_MIXED, name="time")),
     ],
+    ids=["year", "dts", "time_str", "time_str_hr", "mixed"],
 )
 def test_time_domain(test_pd_df, time, domain, index):
     # Check that the time-domain and time-index attributes are set correctly
@@ -69,7 +85,7 @@ def test_swap_time_to_year(test_df, inplace):
         pytest.skip("IamDataFrame with time domain `year` not relevant for this test.")
 
     exp = test_df.data
-    exp["year"] = exp["time"].apply(lambda x: x.year)
+    exp["year"] = exp["time"].dt.year
     exp = exp.drop("time", axis="columns")
     exp = IamDataFrame(exp, meta=test_df.meta)
 
@@ -93,17 +109,16 @@ def test_swap_time_to_year(test_df, inplace):
         # apply formatting for strftime as str
         [TEST_DTS, "%m-%d", ["06-17", "07-21"]],
         # apply openENTRANCE formatting with timezone
-        [OE_DATETIME, OE_SUBANNUAL_FORMAT, ["10-01 23:15+01:00", "10-02 23:15+01:00"]],
+        [OE_DATETIME, oe_subannual_format, ["10-01 23:15+01:00", "10-02 23:15+01:00"]],
     ],
+    ids=["dts-default", "str-default", "str-hr-default", "strftime-md", "oe"],
 )
 @pytest.mark.parametrize("inplace", [True, False])
-def test_swap_time_to_year_subannual(test_pd_df, columns, subannual, dates, inplace):
+def test_swap_time_to_year_subannual(columns, subannual, dates, inplace):
     """Swap time column for year (int) keeping subannual resolution as extra-column"""
 
-    test_pd_df.rename({2005: columns[0], 2010: columns[1]}, axis=1, inplace=True)
-
-    # check swapping time for year
-    df = IamDataFrame(test_pd_df)
+    # check swapping time for year (on a copy to keep the cached object unchanged)
+    df = get_time_df(tuple(columns)).copy()
     obs = df.swap_time_for_year(subannual=subannual, inplace=inplace)
 
     if inplace:
@@ -114,7 +129,7 @@ def test_swap_time_to_year_subannual(test_pd_df, columns, subannual, dates, inpl
     assert_iamframe_equal(obs, exp)
 
     # check that reverting using `swap_year_for_time` yields the original data
-    assert_iamframe_equal(obs.swap_year_for_time(), IamDataFrame(test_pd_df))
+    assert_iamframe_equal(obs.swap_year_for_time(), get_time_df(tuple(columns)))
 
 
 def test_swap_time_to_year_errors(test_df):
@@ -129,7 +144,9 @@ def test_swap_time_to_year_errors(test_df):
     else:
         # set time column to same year so that dropping month/day leads to duplicates
         tdf = test_df.data
-        tdf["time"] = tdf["time"].apply(lambda x: datetime(2005, x.month, x.day))
+        tdf["time"] = pd.to_datetime(
+            {"year": 2005, "month": tdf["time"].dt.month, "day": tdf["time"].dt.day}
+        )
 
         with pytest.raises(ValueError, match="Swapping time for year causes duplicate"):
             IamDataFrame(tdf).swap_time_for_year()